@@ -5,6 +5,7 @@ import dash_html_components as html
 
 from covid19_data_analyzer.dashboard.app import app
 from covid19_data_analyzer.dashboard.utils.controls import (
+    generate_cached_dropdown_options,
     generate_dropdown_options,
     generate_selector,
     get_available_subsets,
@@ -108,7 +109,7 @@ def update_parent_regions(data_source):
     if data_source:
         covid19_data = DASHBOARD_DATA[data_source]
         parent_regions = covid19_data.parent_region.sort_values().unique()
-        return (generate_dropdown_options(parent_regions), *[False] * 3)
+        return (generate_cached_dropdown_options(tuple(parent_regions)), *[False] * 3)
     else:
         return ([], *[True] * 3)
 
@@ -126,7 +127,7 @@ def update_regions(data_source, values):
         covid19_data = DASHBOARD_DATA[data_source]
         selector = generate_selector(covid19_data.parent_region, values)
         regions = covid19_data[selector].region.sort_values().unique()
-        return (generate_dropdown_options(regions), *[False] * 2)
+        return (generate_cached_dropdown_options(tuple(regions)), *[False] * 2)
     else:
         return ([], *[True] * 2)
 
@@ -139,6 +140,6 @@ def update_subsets(data_source):
     if data_source:
         covid19_data = DASHBOARD_DATA[data_source]
         subsets = get_available_subsets(covid19_data)
-        return generate_dropdown_options(subsets), subsets
+        return generate_cached_dropdown_options(tuple(subsets)), subsets
     else:
         return ([],) * 2
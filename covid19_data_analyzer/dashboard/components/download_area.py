@@ -16,7 +16,7 @@ DOWNLOAD_AREA = html.Div(
                 dcc.Dropdown(
                     id="dl_format",
                     placeholder="Select a download file format",
-                    options=generate_dropdown_options(["csv", "xls"]),
+                    options=generate_dropdown_options(["csv", "xls", "parquet"]),
                     value=None,
                     clearable=False,
                     disabled=True,
@@ -1,7 +1,10 @@
-from typing import Iterable
+from typing import Iterable, Tuple
+from functools import lru_cache
 
 import pandas as pd
 
+KNOWN_SUBSETS = ("confirmed", "deaths", "recovered", "still_infectious")
+
 
 def generate_dropdown_options(values: Iterable[str]):
     """
@@ -17,10 +20,30 @@ def generate_dropdown_options(values: Iterable[str]):
     Dict
         Options for the Dropdown
     """
-    options = []
-    for value in values:
-        options.append({"label": value, "value": value})
-    return options
+    return [{"label": value, "value": value} for value in values]
+
+
+@lru_cache(maxsize=16)
+def generate_cached_dropdown_options(values: Tuple[str, ...]):
+    """
+    Cached version of generate_dropdown_options, for options which
+    are regenerated by callbacks
+
+    Parameters
+    ----------
+    values : Tuple[str, ...]
+        Tuple with the option values
+
+    Returns
+    -------
+    Dict
+        Options for the Dropdown
+
+    See Also
+    --------
+    generate_dropdown_options
+    """
+    return generate_dropdown_options(values)
 
 
 def get_available_subsets(covid19_data: pd.DataFrame) -> list:
@@ -35,12 +58,9 @@ def get_available_subsets(covid19_data: pd.DataFrame) -> list:
     Returns
     -------
     list
-        List of available subsets
+        List of available subsets, in the order of the columns
     """
-    column_selector = covid19_data.columns.isin(
-        ["confirmed", "recovered", "deaths", "still_infectious"]
-    )
-    return covid19_data.columns[column_selector].to_list()
+    return [column for column in covid19_data.columns if column in KNOWN_SUBSETS]
 
 
 def generate_selector(df_column: pd.Series, values: Iterable[str]):
@@ -6,6 +6,8 @@ import pandas as pd
 
 from covid19_data_analyzer.dashboard.utils.data_loader import DASHBOARD_DATA
 
+CSV_CHUNK_SIZE = 50_000
+
 
 def generate_download_buffer(data_source: str, file_format: str) -> Dict:
     """
@@ -16,7 +18,7 @@ def generate_download_buffer(data_source: str, file_format: str) -> Dict:
     ----------
     data_source : str
         Name of the data source
-    file_format : "csv" | "xls
+    file_format : "csv" | "xls" | "parquet"
         Format the file should be downloaded in
 
     Returns
@@ -34,12 +36,23 @@ def generate_download_buffer(data_source: str, file_format: str) -> Dict:
         file_name += ".xls"
 
     elif file_format == "csv":
-        with io.StringIO() as str_buffer:
-            covid19_data.to_csv(str_buffer, index=False)
-            buffer.write(str_buffer.getvalue().encode("utf-8"))
-            str_buffer.close()
+        # writing the encoded chunks directly to the buffer, prevents
+        # holding the whole csv in memory as str and as bytes at once
+        text_buffer = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+        covid19_data.to_csv(
+            text_buffer, index=False, chunksize=CSV_CHUNK_SIZE, date_format="%Y-%m-%d"
+        )
+        text_buffer.flush()
+        text_buffer.detach()
         mimetype = "text/csv"
         file_name += ".csv"
 
+    elif file_format == "parquet":
+        covid19_data.to_parquet(
+            buffer, engine="pyarrow", compression="snappy", index=False
+        )
+        mimetype = "application/octet-stream"
+        file_name += ".parquet"
+
     buffer.seek(0)
     return {"buffer": buffer, "file_name": file_name, "mimetype": mimetype}
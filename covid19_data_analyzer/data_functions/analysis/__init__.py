@@ -1,6 +1,9 @@
 import pandas as pd
 
-from covid19_data_analyzer.data_functions.data_utils import get_data_path
+from covid19_data_analyzer.data_functions.data_utils import (
+    get_data_path,
+    read_parquet_or_csv,
+)
 from covid19_data_analyzer.data_functions.scrapers import ALLOWED_SOURCES
 
 
@@ -37,14 +40,14 @@ def get_fit_data(
     if model_name in IMPLEMENTED_FIT_MODELS and data_source in ALLOWED_SOURCES:
         if kind == "plot":
             fitted_plot_data_path = get_data_path(
-                f"{data_source}/{model_name}_model_fit_plot_data.csv"
+                f"{data_source}/{model_name}_model_fit_plot_data.parquet"
             )
-            return pd.read_csv(fitted_plot_data_path, parse_dates=["date"])
+            return read_parquet_or_csv(fitted_plot_data_path, parse_dates=["date"])
         elif kind == "params":
             fitted_param_results_path = get_data_path(
-                f"{data_source}/{model_name}_model_fit_params.csv"
+                f"{data_source}/{model_name}_model_fit_params.parquet"
             )
-            return pd.read_csv(fitted_param_results_path)
+            return read_parquet_or_csv(fitted_param_results_path)
         else:
             raise ValueError("The value of 'kind' need to be 'plot' or 'params'.")
 
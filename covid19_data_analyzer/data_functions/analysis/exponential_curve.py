@@ -3,12 +3,12 @@ from typing import Dict, Union
 import numpy as np
 import pandas as pd
 
-import lmfit
 from lmfit.models import ExponentialModel
 
 from covid19_data_analyzer.data_functions.analysis.factory_functions import (
     batch_fit_model,
     fit_data_model,
+    FitModelResult,
 )
 
 
@@ -17,7 +17,7 @@ def fit_data_exponential_curve(
     parent_region: str,
     region: str,
     data_set: str = "confirmed",
-) -> Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]:
+) -> Dict[str, Union[FitModelResult, pd.DataFrame]]:
     """
     Implementation of fit_data_model, with setting specific to
     the exponential curve model
@@ -37,10 +37,10 @@ def fit_data_exponential_curve(
 
     Returns
     -------
-    Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]
+    Dict[str, Union[FitModelResult, pd.DataFrame]]
         Result dict with keys "model_result" and "plot_data".
 
-        model_result: lmfit.model.ModelResult
+        model_result: FitModelResult
             result of the fit, with optimized parameters
         plot_data: pd.DataFrame
             Same as covid19_region_data, but with an resetted index and
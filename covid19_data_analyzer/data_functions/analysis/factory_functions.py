@@ -1,9 +1,11 @@
-from typing import Callable, Dict, Iterable, Tuple, Union
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from functools import lru_cache
 import itertools
 
 import numpy as np
 import pandas as pd
 
+from joblib import Parallel, delayed, effective_n_jobs
 import lmfit
 
 from covid19_data_analyzer.data_functions.data_utils import (
@@ -17,6 +19,20 @@ from covid19_data_analyzer.data_functions.data_utils import (
     get_infectious,
 )
 
+REGION_BATCH_SIZE = 16
+
+
+class FitModelResult(NamedTuple):
+    """
+    Lightweight version of lmfit.model.ModelResult, which only keeps the
+    attributes used after fitting and is cheap to pickle.
+    """
+
+    best_fit: np.ndarray
+    params: lmfit.Parameters
+    model: lmfit.Model
+    ndata: int
+
 
 def fit_data_model(
     covid19_region_data: pd.DataFrame,
@@ -24,7 +40,7 @@ def fit_data_model(
     data_set: str = "confirmed",
     init_params: dict = {},
     free_var_name: str = "x",
-) -> Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]:
+) -> Dict[str, Union[FitModelResult, pd.DataFrame]]:
     """
     Generic function to fit lmfit.Model models, onto a regional subset covid data.
 
@@ -44,10 +60,10 @@ def fit_data_model(
 
     Returns
     -------
-    Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]
+    Dict[str, Union[FitModelResult, pd.DataFrame]]
         Result dict with keys "model_result" and "plot_data".
 
-        model_result: lmfit.model.ModelResult
+        model_result: FitModelResult
             result of the fit, with optimized parameters
         plot_data: pd.DataFrame
             Same as covid19_region_data, but with an resetted index and
@@ -59,7 +75,13 @@ def fit_data_model(
     y = region_data[data_set].values
     result = model.fit(y, **{free_var_name: x, **init_params})
     region_data[f"fitted_{data_set}"] = result.best_fit
-    return {"model_result": result, "plot_data": region_data}
+    model_result = FitModelResult(
+        best_fit=result.best_fit,
+        params=result.params,
+        model=result.model,
+        ndata=result.ndata,
+    )
+    return {"model_result": model_result, "plot_data": region_data}
 
 
 def calc_extrema(
@@ -96,18 +118,18 @@ def calc_extrema(
         supremum, infimum
     """
     if brute_force_extrema:
-        error_permutation_df = pd.DataFrame(
-            itertools.product(*zip(param_df.stderr, -param_df.stderr)),
-            columns=param_df.index,
+        error_permutations = np.array(
+            list(itertools.product(*zip(param_df.stderr, -param_df.stderr)))
         )
-        param_permutation_df = error_permutation_df + param_df.value
-        result_permutation_df = param_permutation_df.apply(
-            lambda params: func(x, **{**params.to_dict(), **func_options}),
-            axis=1,
-            result_type="expand",
+        param_permutations = error_permutations + param_df.value.values
+        results = np.array(
+            [
+                func(x, **{**dict(zip(param_df.index, params)), **func_options})
+                for params in param_permutations
+            ]
         )
-        supremum = result_permutation_df.max()
-        infimum = result_permutation_df.min()
+        supremum = np.fmax.reduce(results, axis=0)
+        infimum = np.fmin.reduce(results, axis=0)
     else:
         supremum_params = (param_df.value + param_df.stderr).to_dict()
         infimum_params = (param_df.value - param_df.stderr).to_dict()
@@ -116,19 +138,56 @@ def calc_extrema(
     return supremum, infimum
 
 
+@lru_cache(maxsize=128)
+def get_trend_days(
+    ndata: int, days_to_predict: int
+) -> Tuple[np.ndarray, pd.TimedeltaIndex]:
+    """
+    Returns the x values and date offsets of a trend prediction.
+    Since most fits are predicted with the same number of data points and days,
+    the results are cached and the x values are read-only.
+
+    Parameters
+    ----------
+    ndata : int
+        number of data points the model was fitted on
+    days_to_predict : int
+        number of days to predict a trend for
+
+    Returns
+    -------
+    Tuple[np.ndarray, pd.TimedeltaIndex]
+        x, date_offset
+
+        x:
+            values the model function gets evaluated at
+        date_offset:
+            offset of each x value to the last date of the fitted data
+
+    See Also
+    --------
+    predict_trend
+    """
+    x = np.arange(ndata, ndata + days_to_predict)
+    x.setflags(write=False)
+    return x, pd.to_timedelta(x + 1, unit="D")
+
+
 def predict_trend(
-    fit_result: Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]],
+    fit_result: Dict[str, Union[FitModelResult, pd.DataFrame]],
     days_to_predict: int = 30,
     func_options: dict = {},
     param_inverted_stderr: Iterable[str] = [],
     brute_force_extrema: bool = False,
+    anchor_date: Optional[pd.Timestamp] = None,
+    extrema_function: Callable = calc_extrema,
 ) -> pd.DataFrame:
     """
     Generic function to predict a trend from fitted data
 
     Parameters
     ----------
-    fit_result : Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]
+    fit_result : Dict[str, Union[FitModelResult, pd.DataFrame]]
         result of fit_data_model or its implementation
     days_to_predict : int, optional
         number of days to predict a trend for, by default 30
@@ -143,6 +202,14 @@ def predict_trend(
         For some functions, i.e. the logistic curve, this is needed, since simply
         adding or subtracting the errors from the parameter can lead to supremum and/or
         infimum to cross the result with the exact parameters., by default False
+    anchor_date : Optional[pd.Timestamp], optional
+        Last date of the fitted data, which the predicted dates are relative to.
+        Passing it avoids recalculating it, when predicting multiple trends
+        of the same data, by default None (the max of fit_result["plot_data"].date)
+    extrema_function : Callable, optional
+        Function to calculate the supremum and infimum of the trend,
+        with the same signature as calc_extrema. This allows models to use
+        a specialized implementation, by default calc_extrema
 
 
     Returns
@@ -167,16 +234,16 @@ def predict_trend(
     """
     model_result = fit_result["model_result"]
     func = model_result.model.func
-    x = np.arange(model_result.ndata, model_result.ndata + days_to_predict)
+    x, date_offset = get_trend_days(model_result.ndata, days_to_predict)
     param_df = params_to_df(
         model_result.params, param_inverted_stderr=param_inverted_stderr
     )
     params = param_df.value.to_dict()
-    date = fit_result["plot_data"].date.max() + pd.Series(x).apply(
-        lambda x: pd.Timedelta(x + 1, unit="D")
-    )
+    if anchor_date is None:
+        anchor_date = pd.Timestamp(fit_result["plot_data"]["date"].values.max())
+    date = anchor_date + date_offset
     trend = func(x, **{**params, **func_options})
-    sup, inf = calc_extrema(
+    sup, inf = extrema_function(
         x,
         func,
         param_df,
@@ -191,8 +258,9 @@ def predict_trend(
 
 def fit_subsets(
     fit_function: Callable,
-    covid19_data: pd.DataFrame,
-    row: pd.Series,
+    covid19_region_data: pd.DataFrame,
+    parent_region: str,
+    region: str,
     subsets: Iterable,
     data_source: str,
     fit_func_kwargs: dict = {},
@@ -204,11 +272,12 @@ def fit_subsets(
     ----------
     fit_function : Callable
         Implementation of a model with fit_data_model
-    covid19_data : pd.DataFrame
-        Full covid19 data from a data_source
-    row : pd.Series
-        Row of of a dataframe only containing unique value pairs for
-        "region" and "parent_region"
+    covid19_region_data : pd.DataFrame
+        covid19 data of the region, which should be fitted
+    parent_region : str
+        Parent region of the region
+    region : str
+        Name of the region
     subsets : Iterable
         Iterable of subset names
     data_source : str
@@ -232,53 +301,102 @@ def fit_subsets(
     fit_regions
     batch_fit_model
     """
-    region = row.region
-    parent_region = row.parent_region
-    fitted_param_subset = pd.DataFrame()
-    fitted_region_plot_data = None
+    param_rows = []
+    fitted_subset_columns = []
+    region_plot_data = None
     print(f"Fitting data for: {region}, from {data_source}")
     for subset in subsets:
         try:
             fit_result = fit_function(
-                covid19_data, parent_region, region, subset, **fit_func_kwargs
+                covid19_region_data, parent_region, region, subset, **fit_func_kwargs
             )
             fit_param_row = get_fit_param_results_row(
                 region, parent_region, subset, fit_result
             )
-            fitted_param_subset = fitted_param_subset.append(
-                fit_param_row, ignore_index=True
+            param_rows.append(fit_param_row)
+            # all subsets are fitted on the same rows of covid19_region_data,
+            # so the fitted columns can be aligned by index instead of merging
+            region_plot_data = fit_result["plot_data"]
+            fitted_subset_columns.append(
+                region_plot_data[f"fitted_{subset}"].rename(subset)
             )
-            fitted_data_column = f"fitted_{subset}"
-            plot_data = fit_result["plot_data"][
-                ["date", "region", "parent_region", fitted_data_column]
-            ].copy()
-            plot_data = plot_data.rename(columns={fitted_data_column: subset})
-            if fitted_region_plot_data is None:
-                fitted_region_plot_data = plot_data[
-                    ["date", "region", "parent_region", subset]
-                ]
-            else:
-                fitted_region_plot_data = pd.merge(
-                    fitted_region_plot_data,
-                    plot_data,
-                    on=["date", "region", "parent_region"],
-                )
         except (ValueError, TypeError):
             print(f"Error fitting data for: {region} {subset}, from {data_source}")
-    if fitted_region_plot_data is None:
+    if region_plot_data is None:
         return pd.DataFrame(), pd.DataFrame()
     else:
+        fitted_region_plot_data = pd.concat(
+            [region_plot_data[["date", "region", "parent_region"]]]
+            + fitted_subset_columns,
+            axis=1,
+        )
+        fitted_param_subset = pd.DataFrame(param_rows)
         return fitted_region_plot_data, fitted_param_subset
 
 
+def fit_region_batch(
+    fit_function: Callable,
+    region_groups: Iterable[Tuple[Tuple[str, str], pd.DataFrame]],
+    subsets: Iterable,
+    data_source: str,
+    fit_func_kwargs: dict = {},
+) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Function to sequentially fit a batch of regions.
+
+    Parameters
+    ----------
+    fit_function : Callable
+        Implementation of a model with fit_data_model
+    region_groups : Iterable[Tuple[Tuple[str, str], pd.DataFrame]]
+        Groups of covid19 data grouped by "parent_region" and "region",
+        as returned by iterating over a DataFrameGroupBy
+    subsets : Iterable
+        Iterable of subset names
+    data_source : str
+        name of the data source, only needed to print debug information
+    fit_func_kwargs : dict, optional
+        Additional kwargs passed to fit_function, by default {}
+
+    Returns
+    -------
+    List[Tuple[pd.DataFrame, pd.DataFrame]]
+        Results of fit_subsets for each region in region_groups
+
+    See Also
+    --------
+    fit_subsets
+    fit_regions
+    """
+    return [
+        fit_subsets(
+            fit_function=fit_function,
+            covid19_region_data=covid19_region_data,
+            parent_region=parent_region,
+            region=region,
+            subsets=subsets,
+            data_source=data_source,
+            fit_func_kwargs=fit_func_kwargs,
+        )
+        for (parent_region, region), covid19_region_data in region_groups
+    ]
+
+
 def fit_regions(
     covid19_data: pd.DataFrame,
     fit_function: Callable,
     data_source: str,
     fit_func_kwargs: dict = {},
+    n_jobs: int = -1,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
-    Function to fit all regions of a covid dataset
+    Function to fit all regions of a covid dataset.
+    Since the regions are independent of each other,
+    they are fitted in parallel worker processes, in batches of
+    REGION_BATCH_SIZE neighboring regions.
+    The data is grouped by region once upfront, so each worker only
+    receives the data of the regions it fits, and the batches are
+    created lazily to keep the peak memory low.
 
     Parameters
     ----------
@@ -290,6 +408,8 @@ def fit_regions(
         name of the data source, only needed to print debug information
     fit_func_kwargs : dict, optional
         Additional kwargs passed to fit_function, by default {}
+    n_jobs : int, optional
+        Number of worker processes used by joblib, by default -1 (all cores)
 
     Returns
     -------
@@ -304,28 +424,41 @@ def fit_regions(
     See Also
     --------
     fit_subsets
+    fit_region_batch
     batch_fit_model
     """
     subset_selector = covid19_data.columns.isin(["confirmed", "deaths", "recovered"])
     subsets = covid19_data.columns[subset_selector]
-    regions_df = covid19_data[["region", "parent_region"]].drop_duplicates("region")
-    fitted_param_results = pd.DataFrame()
-    fitted_plot_data = pd.DataFrame()
-    for _, row in regions_df.iterrows():
-        fitted_region_plot_data, fitted_param_subset = fit_subsets(
+    fit_columns = ["date", "region", "parent_region", *subsets]
+    region_groups = iter(
+        covid19_data[fit_columns].groupby(
+            ["parent_region", "region"], sort=False, observed=True
+        )
+    )
+    # batches are only created when joblib dispatches them,
+    # so not all region groups are held in memory at once
+    region_batches = iter(
+        lambda: list(itertools.islice(region_groups, REGION_BATCH_SIZE)), []
+    )
+    batch_results = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(fit_region_batch)(
             fit_function=fit_function,
-            covid19_data=covid19_data,
-            row=row,
+            region_groups=region_batch,
             subsets=subsets,
             data_source=data_source,
             fit_func_kwargs=fit_func_kwargs,
         )
-        fitted_param_results = fitted_param_results.append(
-            fitted_param_subset, ignore_index=True
-        )
-        fitted_plot_data = fitted_plot_data.append(
-            fitted_region_plot_data, ignore_index=True
-        )
+        for region_batch in region_batches
+    )
+    region_results = list(itertools.chain.from_iterable(batch_results))
+    fitted_plot_data = pd.concat(
+        [fitted_region_plot_data for fitted_region_plot_data, _ in region_results],
+        ignore_index=True,
+    )
+    fitted_param_results = pd.concat(
+        [fitted_param_subset for _, fitted_param_subset in region_results],
+        ignore_index=True,
+    )
 
     get_infectious(fitted_plot_data)
 
@@ -334,12 +467,70 @@ def fit_regions(
     return fitted_plot_data, fitted_param_results
 
 
+def fit_data_source(
+    fit_function: Callable,
+    model_name: str,
+    data_source: str,
+    fit_func_kwargs: dict = {},
+    n_jobs: int = -1,
+) -> None:
+    """
+    Generic function to fit a fit_function to the data of a data source and
+    save them to file
+
+    Parameters
+    ----------
+    fit_function : Callable
+        Implementation of a model with fit_data_model
+    model_name : str
+        Name of the model which is fitted, used to generate the path
+    data_source : str
+        Name of the data source which should be fitted
+    fit_func_kwargs : dict, optional
+        Additional kwargs passed to fit_function, by default {}
+    n_jobs : int, optional
+        Number of worker processes used to fit the regions, by default -1 (all cores)
+
+    See Also
+    --------
+    fit_regions
+    batch_fit_model
+    """
+    covid19_data = get_data(data_source)
+    fitted_plot_data, fitted_param_results = fit_regions(
+        covid19_data=covid19_data,
+        fit_function=fit_function,
+        data_source=data_source,
+        fit_func_kwargs=fit_func_kwargs,
+        n_jobs=n_jobs,
+    )
+    fitted_plot_data_path = get_data_path(
+        f"{data_source}/{model_name}_model_fit_plot_data.parquet"
+    )
+    fitted_param_results_path = get_data_path(
+        f"{data_source}/{model_name}_model_fit_params.parquet"
+    )
+
+    fitted_param_results.to_parquet(
+        fitted_param_results_path, engine="pyarrow", compression="zstd", index=False
+    )
+    fitted_plot_data.to_parquet(
+        fitted_plot_data_path, engine="pyarrow", compression="zstd", index=False
+    )
+
+
 def batch_fit_model(
-    fit_function: Callable, model_name: str, fit_func_kwargs: dict = {},
+    fit_function: Callable,
+    model_name: str,
+    fit_func_kwargs: dict = {},
+    n_jobs: int = -1,
 ) -> None:
     """
     Generic function to fit a fit_function to the data of all data sources and
-    save them to file
+    save them to file.
+    Since the data sources are independent of each other, they are fitted
+    in parallel worker processes, which share the n_jobs cores
+    for fitting their regions.
 
     Parameters
     ----------
@@ -349,26 +540,24 @@ def batch_fit_model(
         Name of the model which is fitted, used to generate the path
     fit_func_kwargs : dict, optional
         Additional kwargs passed to fit_function, by default {}
+    n_jobs : int, optional
+        Total number of cores used by joblib, by default -1 (all cores)
 
     See Also
     --------
     fit_subsets
     fit_regions
+    fit_data_source
     """
-    for data_source in ALLOWED_SOURCES:
-        covid19_data = get_data(data_source)
-        fitted_plot_data, fitted_param_results = fit_regions(
-            covid19_data=covid19_data,
+    n_cores = effective_n_jobs(n_jobs)
+    source_n_jobs = min(len(ALLOWED_SOURCES), n_cores)
+    Parallel(n_jobs=source_n_jobs, backend="loky")(
+        delayed(fit_data_source)(
             fit_function=fit_function,
+            model_name=model_name,
             data_source=data_source,
             fit_func_kwargs=fit_func_kwargs,
+            n_jobs=max(1, n_cores // source_n_jobs),
         )
-        fitted_plot_data_path = get_data_path(
-            f"{data_source}/{model_name}_model_fit_plot_data.csv"
-        )
-        fitted_param_results_path = get_data_path(
-            f"{data_source}/{model_name}_model_fit_params.csv"
-        )
-
-        fitted_param_results.to_csv(fitted_param_results_path, index=False)
-        fitted_plot_data.to_csv(fitted_plot_data_path, index=False)
+        for data_source in ALLOWED_SOURCES
+    )
@@ -1,19 +1,24 @@
-from typing import Dict, Union
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+import itertools
 
+import numpy as np
 import pandas as pd
 
-import lmfit
+from joblib import Parallel, delayed
 from lmfit.models import StepModel
 
 
 from covid19_data_analyzer.data_functions.analysis.factory_functions import (
     batch_fit_model,
     fit_data_model,
+    FitModelResult,
     predict_trend,
 )
 
 
 LOGISTIC_MODEL = StepModel(form="logistic")
+LOGISTIC_PARAM_NAMES = ["amplitude", "center", "sigma"]
+LOGISTIC_ERROR_SIGNS = np.array(list(itertools.product((1, -1), repeat=3)))
 
 
 def fit_data_logistic_curve(
@@ -22,7 +27,7 @@ def fit_data_logistic_curve(
     region: str,
     data_set: str = "confirmed",
     sigma: Union[int, float] = 5,
-) -> Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]:
+) -> Dict[str, Union[FitModelResult, pd.DataFrame]]:
     """
     Implementation of fit_data_model, with setting specific to
     the logistic curve model
@@ -45,15 +50,20 @@ def fit_data_logistic_curve(
 
     Returns
     -------
-    Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]
+    Dict[str, Union[FitModelResult, pd.DataFrame]]
         Result dict with keys "model_result" and "plot_data".
 
-        model_result: lmfit.model.ModelResult
+        model_result: FitModelResult
             result of the fit, with optimized parameters
         plot_data: pd.DataFrame
             Same as covid19_region_data, but with an resetted index and
             and added fir result
 
+    Raises
+    ------
+    ValueError
+        If no value of the data exceeds half of its max (e.g. all values are 0)
+
     See Also
     --------
     fit_data_model
@@ -62,11 +72,22 @@ def fit_data_logistic_curve(
         covid19_data.parent_region == parent_region
     )
     covid19_region_data = covid19_data.loc[data_selector, :].reset_index(drop=True)
-    center = covid19_region_data[
-        covid19_region_data[data_set] > covid19_region_data[data_set].max() / 2
-    ].index.min()
+    region_values = covid19_region_data[data_set]
+    if region_values.is_monotonic_increasing and region_values.values[-1] > 0:
+        # cumulative data is sorted, so the center can be found by bisection
+        current_max = region_values.values[-1]
+        center = int(np.searchsorted(region_values.values, current_max / 2, "right"))
+    else:
+        current_max = region_values.max()
+        above_half_max = region_values.values > current_max / 2
+        if not above_half_max.any():
+            # i.e. all values are zero, so there is no curve to fit
+            raise ValueError(
+                f"The {data_set} data of {region} has no values above half its max."
+            )
+        center = int(np.argmax(above_half_max))
     init_params = {
-        "amplitude": covid19_region_data[data_set].max(),
+        "amplitude": current_max,
         "center": center,
         "sigma": sigma,
     }
@@ -76,9 +97,165 @@ def fit_data_logistic_curve(
     return fit_result
 
 
+def fit_data_logistic_curve_many(
+    covid19_data: pd.DataFrame,
+    regions: Iterable[Tuple[str, str]],
+    data_set: str = "confirmed",
+    sigma: Union[int, float] = 5,
+    n_jobs: int = -1,
+) -> List[Dict[str, Union[FitModelResult, pd.DataFrame]]]:
+    """
+    Fits the logistic curve model to multiple regions in parallel,
+    since the fits of the regions are independent of each other.
+
+    Parameters
+    ----------
+    covid19_data : pd.DataFrame
+        Full covid19 data from a data_source
+    regions : Iterable[Tuple[str, str]]
+        Iterable of (parent_region, region) pairs which should be fitted
+    data_set : str, optional
+        which subdata schold be fitted, need to be of value
+        ["confirmed", "recovered", deaths], by default "confirmed"
+    sigma : int, optional
+        initial value for the parameter 'sigma' of the logistic curve model,
+        by default 5
+    n_jobs : int, optional
+        Number of worker processes used by joblib, by default -1 (all cores)
+
+    Returns
+    -------
+    List[Dict[str, Union[FitModelResult, pd.DataFrame]]]
+        Results of fit_data_logistic_curve, in the same order as regions
+
+    See Also
+    --------
+    fit_data_logistic_curve
+    """
+    region_groups = covid19_data[["date", "region", "parent_region", data_set]].groupby(
+        ["parent_region", "region"], sort=False, observed=True
+    )
+    # each task only gets the data of its region, since pickling the full data
+    # for every task costs more than the fits themselves
+    return Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(fit_data_logistic_curve)(
+            region_groups.get_group((parent_region, region)),
+            parent_region,
+            region,
+            data_set,
+            sigma,
+        )
+        for parent_region, region in regions
+    )
+
+
+def calc_logistic_curve(
+    x: np.ndarray,
+    amplitude: Union[float, np.ndarray],
+    center: Union[float, np.ndarray],
+    sigma: Union[float, np.ndarray],
+) -> np.ndarray:
+    """
+    Logistic curve as used by LOGISTIC_MODEL, which unlike the lmfit
+    lineshape also supports arrays of parameters, which are broadcasted with x.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Values the curve should be evaluated at
+    amplitude : Union[float, np.ndarray]
+        Amplitude of the curve
+    center : Union[float, np.ndarray]
+        Center of the curve
+    sigma : Union[float, np.ndarray]
+        Width of the curve
+
+    Returns
+    -------
+    np.ndarray
+        Values of the logistic curve
+    """
+    return amplitude * (1 - 1 / (1 + np.exp((x - center) / sigma)))
+
+
+def calc_logistic_curve_extrema(
+    x: np.ndarray,
+    func: Callable,
+    param_df: pd.DataFrame,
+    func_options: dict = {},
+    brute_force_extrema: bool = False,
+) -> Tuple[np.ndarray]:
+    """
+    Specialized version of calc_extrema for the logistic curve model.
+
+    If the signs of amplitude and sigma don't change within their errors,
+    the signs of the partial derivatives with respect to the parameters are
+    known for each x, so the extrema only need two evaluations of the curve.
+    Otherwise (or if brute_force_extrema is True), rather than calling the
+    model function for each permutation of adding and subtracting the errors
+    from the parameters, all permutations are evaluated at once with
+    numpy broadcasting.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Values the supremum and infimum should be calculated over
+    func : Callable
+        Function of the model, only needed for compatibility with calc_extrema
+    param_df : pd.DataFrame
+        DataFrame with parameters and errors
+    func_options : dict, optional
+        options for func, only needed for compatibility with calc_extrema
+    brute_force_extrema : bool, optional
+        Whether or not to always evaluate all permutations, by default False
+
+    Returns
+    -------
+    Tuple[np.ndarray]
+        supremum, infimum
+
+    See Also
+    --------
+    calc_extrema
+    """
+    logistic_params = param_df.loc[LOGISTIC_PARAM_NAMES]
+    amplitude, center, sigma = logistic_params.value.values
+    d_amplitude, d_center, d_sigma = np.abs(logistic_params.stderr.values)
+    signs_are_stable = (
+        np.sign(amplitude - d_amplitude) == np.sign(amplitude + d_amplitude) != 0
+        and np.sign(sigma - d_sigma) == np.sign(sigma + d_sigma) != 0
+    )
+    if not brute_force_extrema and signs_are_stable:
+        # f rises with the amplitude, falls with the center for sign(A*sigma) > 0
+        # and the sign of df/dsigma is -sign(A*(x-center))
+        amplitude_sign = np.sign(amplitude)
+        center_shift = amplitude_sign * np.sign(sigma) * d_center
+        center_sup = center - center_shift
+        center_inf = center + center_shift
+        sigma_sup = sigma - amplitude_sign * np.sign(x - center_sup) * d_sigma
+        sigma_inf = sigma + amplitude_sign * np.sign(x - center_inf) * d_sigma
+        supremum = calc_logistic_curve(
+            x, amplitude + d_amplitude, center_sup, sigma_sup
+        )
+        infimum = calc_logistic_curve(x, amplitude - d_amplitude, center_inf, sigma_inf)
+        return supremum, infimum
+
+    param_permutations = (
+        logistic_params.value.values
+        + LOGISTIC_ERROR_SIGNS * logistic_params.stderr.values
+    )
+    amplitude, center, sigma = param_permutations.T[..., np.newaxis]
+    results = calc_logistic_curve(x, amplitude, center, sigma)
+    supremum = np.fmax.reduce(results, axis=0)
+    infimum = np.fmin.reduce(results, axis=0)
+    return supremum, infimum
+
+
 def predict_trend_logistic_curve(
-    fit_result: Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]],
+    fit_result: Dict[str, Union[FitModelResult, pd.DataFrame]],
     days_to_predict: int = 30,
+    anchor_date: Optional[pd.Timestamp] = None,
+    brute_force_extrema: bool = False,
 ) -> pd.DataFrame:
     """
     Implementation of fit_data_model, with setting specific to
@@ -87,10 +264,16 @@ def predict_trend_logistic_curve(
 
     Parameters
     ----------
-    fit_result : Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]
+    fit_result : Dict[str, Union[FitModelResult, pd.DataFrame]]
         result of fit_data_model or its implementation
     days_to_predict : int, optional
         number of days to predict a trend for, by default 30
+    anchor_date : Optional[pd.Timestamp], optional
+        Last date of the fitted data, by default None
+        (the max of fit_result["plot_data"].date)
+    brute_force_extrema : bool, optional
+        Whether or not to evaluate all permutations of the parameter errors,
+        to calculate the extrema, by default False
 
 
     Returns
@@ -113,13 +296,16 @@ def predict_trend_logistic_curve(
     fit_data_model
     calc_extrema
     params_to_df
+    calc_logistic_curve_extrema
     """
 
     return predict_trend(
         fit_result,
         days_to_predict=days_to_predict,
         func_options={"form": "logistic"},
-        brute_force_extrema=True,
+        brute_force_extrema=brute_force_extrema,
+        anchor_date=anchor_date,
+        extrema_function=calc_logistic_curve_extrema,
     )
 
 
@@ -1,9 +1,24 @@
-from typing import Dict, Iterable, Tuple, Union
+import json
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple, Union
 from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 import lmfit
+import numpy as np
 import pandas as pd
 
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+if TYPE_CHECKING:
+    # only imported for type checking, since factory_functions imports this module
+    from covid19_data_analyzer.data_functions.analysis.factory_functions import (
+        FitModelResult,
+    )
+
 
 def get_data_path(sub_path: str) -> Path:
     """
@@ -29,6 +44,149 @@ def get_data_path(sub_path: str) -> Path:
     return data_path
 
 
+def data_file_exists(parquet_path: Path) -> bool:
+    """
+    Checks if a parquet file or the csv file with the same name exists.
+
+    Parameters
+    ----------
+    parquet_path : Path
+        Path to the parquet file
+
+    Returns
+    -------
+    bool
+        Whether or not the data was saved in either format
+
+    See Also
+    --------
+    read_parquet_or_csv
+    """
+    return parquet_path.is_file() or parquet_path.with_suffix(".csv").is_file()
+
+
+def read_parquet_or_csv(
+    parquet_path: Path, parse_dates: Iterable[str] = [], date_format: str = "%Y-%m-%d"
+) -> pd.DataFrame:
+    """
+    Reads a parquet file and falls back to the csv file with the same name,
+    if the parquet file doesn't exist (i.e. data saved by an older version).
+
+    Parameters
+    ----------
+    parquet_path : Path
+        Path to the parquet file
+    parse_dates : Iterable[str], optional
+        Columns which should be parsed as dates, if the csv file is read,
+        by default []
+    date_format : str, optional
+        Format of the dates in the csv file, by default "%Y-%m-%d"
+
+    Returns
+    -------
+    pd.DataFrame
+        Data saved in the file
+    """
+    if parquet_path.is_file():
+        return pd.read_parquet(parquet_path, engine="pyarrow")
+    else:
+        csv_data = pd.read_csv(parquet_path.with_suffix(".csv"))
+        for date_column in parse_dates:
+            csv_data[date_column] = pd.to_datetime(
+                csv_data[date_column], format=date_format, cache=True
+            )
+        return csv_data
+
+
+def read_cache_info(cache_info_path: Path) -> Dict[str, Dict[str, str]]:
+    """
+    Reads the ETag and Last-Modified headers of the last downloads,
+    which are saved next to the locally saved data.
+
+    Parameters
+    ----------
+    cache_info_path : Path
+        Path to the json file containing the cache info
+
+    Returns
+    -------
+    Dict[str, Dict[str, str]]
+        Cache info of the downloaded urls, with the urls as keys
+        or an empty dict if no cache info was saved yet.
+
+    See Also
+    --------
+    download_if_modified
+    """
+    if cache_info_path.is_file():
+        with open(cache_info_path) as cache_info_file:
+            return json.load(cache_info_file)
+    return {}
+
+
+def save_cache_info(
+    cache_info_path: Path, cache_info: Dict[str, Dict[str, str]]
+) -> None:
+    """
+    Saves the ETag and Last-Modified headers of the downloads,
+    which were used to update the locally saved data.
+
+    Parameters
+    ----------
+    cache_info_path : Path
+        Path to the json file containing the cache info
+    cache_info : Dict[str, Dict[str, str]]
+        Cache info of the downloaded urls, with the urls as keys
+
+    See Also
+    --------
+    download_if_modified
+    """
+    with open(cache_info_path, "w") as cache_info_file:
+        json.dump(cache_info, cache_info_file, indent=2)
+
+
+def download_if_modified(
+    url: str, cache_info: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """
+    Downloads the content of url, unless it didn't change since the download
+    described by cache_info (HTTP conditional GET).
+
+    Parameters
+    ----------
+    url : str
+        Url of the file to download
+    cache_info : Optional[Dict[str, str]], optional
+        "etag" and "last_modified" header values of the last download,
+        by default None which always downloads the file
+
+    Returns
+    -------
+    Tuple[Optional[bytes], Dict[str, str]]
+        Content of the file, which is None if the file wasn't modified,
+        and the cache info of the file.
+    """
+    request = Request(url)
+    if cache_info:
+        if cache_info.get("etag"):
+            request.add_header("If-None-Match", cache_info["etag"])
+        if cache_info.get("last_modified"):
+            request.add_header("If-Modified-Since", cache_info["last_modified"])
+    try:
+        with urlopen(request) as response:
+            content = response.read()
+            new_cache_info = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+    except HTTPError as error:
+        if error.code == 304:
+            return None, cache_info
+        raise
+    return content, new_cache_info
+
+
 def get_infectious(covid_df: pd.DataFrame) -> None:
     """
     Calculates the number of still infectious people.
@@ -40,12 +198,33 @@ def get_infectious(covid_df: pd.DataFrame) -> None:
     covid_df : pd.DataFrame
         Dataframe containing all covid19 data
     """
-    if covid_df.columns.isin(["recovered"]).any():
-        recovered = covid_df.recovered.fillna(0)
-    else:
-        recovered = 0
-    deaths = covid_df.deaths.fillna(0)
-    covid_df["still_infectious"] = covid_df.confirmed - recovered - deaths
+    subtracted_columns = ["recovered", "deaths"]
+    if "recovered" not in covid_df.columns:
+        subtracted_columns.remove("recovered")
+    # the result only becomes float if any of the columns is float,
+    # so integer counts stay integers
+    dtype = np.result_type(*covid_df[["confirmed", *subtracted_columns]].dtypes)
+    still_infectious = covid_df["confirmed"].to_numpy(dtype=dtype, copy=True)
+    for column in subtracted_columns:
+        still_infectious -= np.nan_to_num(covid_df[column].to_numpy(dtype=dtype))
+    covid_df["still_infectious"] = still_infectious
+
+
+def categorize_regions(covid_df: pd.DataFrame) -> None:
+    """
+    Converts the region and parent_region columns to categoricals,
+    so grouping, sorting and comparing them works on integer codes
+    rather than strings.
+    This function uses the mutability of DataFrames,
+    which is why it doesn't have a return value
+
+    Parameters
+    ----------
+    covid_df : pd.DataFrame
+        covid19 DataFrame (needs to be in uniform style)
+    """
+    for column in ["region", "parent_region"]:
+        covid_df[column] = covid_df[column].astype("category")
 
 
 def calc_country_total(covid_df: pd.DataFrame) -> pd.DataFrame:
@@ -64,14 +243,36 @@ def calc_country_total(covid_df: pd.DataFrame) -> pd.DataFrame:
         Dataframe containing the totals for countries, which before only had
         their regions listed.
     """
-    total_df = pd.DataFrame()
-    for (parent, date), group in covid_df.groupby(["parent_region", "date"]):
-        if parent != "#Global":
-            country_total = group.sum()
-            country_total.parent_region = "#Global"
-            country_total.region = f"{parent} (total)"
-            country_total["date"] = date
-            total_df = total_df.append(country_total, ignore_index=True)
+    parent_region_codes, parent_regions = pd.factorize(covid_df["parent_region"])
+    parent_regions = np.asarray(parent_regions, dtype=str).astype(object)
+    # comparing the unique labels rather than every row, the appended False
+    # excludes rows with a missing parent_region, which have the code -1
+    is_region_code = np.append(parent_regions != "#Global", False)
+    region_rows = np.flatnonzero(is_region_code[parent_region_codes])
+    parent_region_codes = parent_region_codes[region_rows]
+    dates = covid_df["date"].to_numpy()[region_rows]
+    # sorting by parent_region and date puts the rows of each group next to
+    # each other, so the groups can be summed up with np.add.reduceat
+    sort_order = np.lexsort((dates, parent_region_codes))
+    row_order = region_rows[sort_order]
+    parent_region_codes = parent_region_codes[sort_order]
+    dates = dates[sort_order]
+    is_group_start = np.ones(len(row_order), dtype=bool)
+    is_group_start[1:] = (parent_region_codes[1:] != parent_region_codes[:-1]) | (
+        dates[1:] != dates[:-1]
+    )
+    group_starts = np.flatnonzero(is_group_start)
+    group_codes = parent_region_codes[group_starts]
+    total_df = pd.DataFrame(
+        {"parent_region": parent_regions[group_codes], "date": dates[group_starts]}
+    )
+    value_columns = covid_df.select_dtypes("number").columns
+    for column in value_columns:
+        # groupby sums skip NaN values, which np.add.reduceat doesn't
+        values = np.nan_to_num(covid_df[column].to_numpy()[row_order])
+        total_df[column] = np.add.reduceat(values, group_starts)
+    total_df["region"] = (parent_regions + " (total)")[group_codes]
+    total_df["parent_region"] = "#Global"
     return total_df
 
 
@@ -95,11 +296,25 @@ def calc_worldwide_total(
     pd.DataFrame
         Dataframe containing the worldwide totals.
     """
-    global_country_df = covid_df[covid_df[parent_region_label] == "#Global"]
-    worldwide_total_df = global_country_df.groupby(["date"]).sum()
+    global_country_rows = np.flatnonzero(
+        covid_df[parent_region_label].to_numpy() == "#Global"
+    )
+    dates = covid_df["date"].to_numpy()[global_country_rows]
+    # a stable sort by date puts the rows of each date next to each other,
+    # so the dates can be summed up with np.add.reduceat
+    sort_order = np.argsort(dates, kind="stable")
+    row_order = global_country_rows[sort_order]
+    dates = dates[sort_order]
+    is_date_start = np.ones(len(dates), dtype=bool)
+    is_date_start[1:] = dates[1:] != dates[:-1]
+    date_starts = np.flatnonzero(is_date_start)
+    worldwide_total_df = pd.DataFrame({"date": dates[date_starts]})
+    for column in covid_df.select_dtypes("number").columns:
+        # groupby sums skip NaN values, which np.add.reduceat doesn't
+        values = np.nan_to_num(covid_df[column].to_numpy()[row_order])
+        worldwide_total_df[column] = np.add.reduceat(values, date_starts)
     worldwide_total_df[parent_region_label] = "#Global"
     worldwide_total_df[region_label] = "#Worldwide"
-    worldwide_total_df.reset_index(inplace=True)
     return worldwide_total_df
 
 
@@ -127,11 +342,9 @@ def get_shifted_dfs(
         shifted and unshifted covid19 data, with date, parent_region and region as index
     """
     unshifted_data = covid_df.set_index(["date", "parent_region", "region"])
-    shifted_data = covid_df.copy()
-    shifted_data.date = shifted_data.date + pd.Timedelta(
-        time_shift, unit=time_shift_unit
-    )
-    shifted_data = shifted_data.set_index(["date", "parent_region", "region"])
+    shifted_data = covid_df.assign(
+        date=covid_df.date + pd.Timedelta(time_shift, unit=time_shift_unit)
+    ).set_index(["date", "parent_region", "region"])
     return unshifted_data, shifted_data
 
 
@@ -147,11 +360,15 @@ def get_daily_growth(covid_df: pd.DataFrame) -> pd.DataFrame:
     Returns
     -------
     pd.DataFrame
-        covid19 DataFrame, with daily growth values instead of totals.
+        covid19 DataFrame, with daily growth values instead of totals,
+        sorted by parent_region, region and date.
     """
-    unshifted_data, shifted_data = get_shifted_dfs(covid_df)
-    daily_increase = unshifted_data - shifted_data
-    return daily_increase.dropna().reset_index()
+    daily_growth = covid_df.sort_values(["parent_region", "region", "date"])
+    value_columns = daily_growth.select_dtypes("number").columns
+    daily_growth[value_columns] = daily_growth.groupby(
+        ["parent_region", "region"], sort=False, observed=True
+    )[value_columns].diff()
+    return daily_growth.dropna().reset_index(drop=True)
 
 
 def get_growth_rate(covid_df: pd.DataFrame) -> pd.DataFrame:
@@ -168,11 +385,25 @@ def get_growth_rate(covid_df: pd.DataFrame) -> pd.DataFrame:
     pd.DataFrame
         covid19 DataFrame, with growth rate values instead of totals.
     """
-    daily_growth = get_daily_growth(covid_df)
-    unshifted_data, shifted_data = get_shifted_dfs(daily_growth)
+    growth_rate = get_daily_growth(covid_df)
+    value_columns = growth_rate.select_dtypes("number").columns
+    daily_values = growth_rate[value_columns].to_numpy(dtype=float)
+    previous_values = (
+        growth_rate.groupby(["parent_region", "region"], sort=False, observed=True)[
+            value_columns
+        ]
+        .shift()
+        .to_numpy(dtype=float)
+    )
     # the '+1' is needed to prevent zero division
-    growth_rate = unshifted_data / (shifted_data + 1)
-    return growth_rate.dropna().reset_index()
+    if numexpr is not None:
+        growth_rate[value_columns] = numexpr.evaluate(
+            "daily_values / (previous_values + 1)"
+        )
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth_rate[value_columns] = daily_values / (previous_values + 1)
+    return growth_rate.dropna().reset_index(drop=True)
 
 
 def params_to_dict(params: lmfit.Parameters, kind: str = "values") -> dict:
@@ -191,13 +422,11 @@ def params_to_dict(params: lmfit.Parameters, kind: str = "values") -> dict:
     dict
         Dict containing the parameternames as key and the values or stderr as values
     """
-    result_dict = {}
-    for name, param in params.items():
-        if kind == "values":
-            result_dict[name] = param.value
-        elif kind == "stderr":
-            result_dict[name] = param.stderr
-    return result_dict
+    if kind == "values":
+        return {name: param.value for name, param in params.items()}
+    elif kind == "stderr":
+        return {name: param.stderr for name, param in params.items()}
+    return {}
 
 
 def params_to_df(
@@ -219,12 +448,13 @@ def params_to_df(
     pd.DataFrame
         DataFrame with columns "value" and "stderr", parameternames as index
     """
-    param_vals = params_to_dict(params)
-    param_stderrs = params_to_dict(params, kind="stderr")
-    param_df = pd.DataFrame({"values": param_vals, "stderr": param_stderrs})
-    param_df.loc[param_inverted_stderr, "stderr"] = -param_df.loc[
-        param_inverted_stderr, "stderr"
-    ]
+    names, values, stderrs = zip(
+        *((name, param.value, param.stderr) for name, param in params.items())
+    )
+    param_df = pd.DataFrame(
+        {"value": values, "stderr": np.array(stderrs, dtype=float)}, index=names
+    )
+    param_df.loc[list(param_inverted_stderr), "stderr"] *= -1
     return param_df
 
 
@@ -232,11 +462,12 @@ def get_fit_param_results_row(
     region: str,
     parent_region: str,
     subset: str,
-    fit_result: Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]],
-) -> pd.DataFrame:
+    fit_result: Dict[str, Union["FitModelResult", pd.DataFrame]],
+) -> Dict[str, Union[str, float]]:
     """
     Returns a row containing all fitted parameters for a region,
-    which can than be combined to a fit param results dataframe
+    which can than be combined to a fit param results dataframe,
+    by passing a list of rows to pd.DataFrame
 
     Parameters
     ----------
@@ -246,33 +477,23 @@ def get_fit_param_results_row(
         Parent region of the fitted region
     subset:str
         Subset of the regions data which was fitted
-    fit_result : Dict[str, Union[lmfit.model.ModelResult, pd.DataFrame]]
+    fit_result : Dict[str, Union[FitModelResult, pd.DataFrame]]
         Result of fit_data_model or its implementation
 
     Returns
     -------
-    pd.DataFrame
+    Dict[str, Union[str, float]]
         Row of fit param results dataframe, for the fitted region
 
     See Also
     --------
     covid19_data_analyzer.data_functions.analysis.factory_functions.fit_data_model
     """
-    flat_params_df = pd.DataFrame(
-        [{"region": region, "parent_region": parent_region, "subset": subset}]
-    )
-    params_df = params_to_df(fit_result["model_result"].params)
-    transformed_df = (
-        params_df.reset_index()
-        .melt(id_vars="index", var_name="kind")
-        .sort_values("index")
-    )
-    new_index = transformed_df["index"] + " " + transformed_df["kind"]
-    transformed_df = (
-        transformed_df.set_index(new_index).drop(["index", "kind"], axis=1).T
-    )
-    flat_params_df = flat_params_df.join(transformed_df.reset_index(drop=True))
-    return flat_params_df
+    flat_params = {"region": region, "parent_region": parent_region, "subset": subset}
+    for name, param in fit_result["model_result"].params.items():
+        flat_params[f"{name} values"] = param.value
+        flat_params[f"{name} stderr"] = param.stderr
+    return flat_params
 
 
 def translate_funkeinteraktiv_fit_data():
@@ -290,13 +511,28 @@ def translate_funkeinteraktiv_fit_data():
     translate_df = pd.read_csv(translate_path).rename(
         {"label_parent_en": "parent_region", "label_en": "region"}, axis=1
     )
-    region_df = translate_df[["region", "label"]].set_index("label", drop=True)
-    parent_region_df = translate_df[["parent_region", "label_parent"]].set_index(
-        "label_parent", drop=True
-    )
-    translate_dict = {**parent_region_df.to_dict(), **region_df.to_dict()}
-    for source_file_path in source_dir.glob("*model_fit*.csv"):
-        data_df = pd.read_csv(source_file_path)
+    translate_maps = {
+        "region": translate_df.set_index("label")["region"].to_dict(),
+        "parent_region": translate_df.set_index("label_parent")[
+            "parent_region"
+        ].to_dict(),
+    }
+    for source_file_path in source_dir.glob("*model_fit*.parquet"):
+        # reading the labels as categorical, allows to only translate
+        # the unique labels rather than every row
+        data_df = pd.read_parquet(
+            source_file_path,
+            engine="pyarrow",
+            read_dictionary=list(translate_maps.keys()),
+        )
+        for column, translate_map in translate_maps.items():
+            data_df[column] = (
+                data_df[column]
+                .map(lambda label: translate_map.get(label, label))
+                .astype(object)
+            )
         rel_path = source_file_path.relative_to(source_dir)
         target_file_path = target_dir / rel_path
-        data_df.replace(translate_dict).to_csv(target_file_path, index=False)
+        data_df.to_parquet(
+            target_file_path, engine="pyarrow", compression="zstd", index=False
+        )
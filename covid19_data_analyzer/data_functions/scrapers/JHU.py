@@ -1,15 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import io
+
 import pandas as pd
+import pyarrow.csv
 
 
 from covid19_data_analyzer.data_functions.data_utils import (
+    categorize_regions,
+    data_file_exists,
+    download_if_modified,
     get_data_path,
     get_infectious,
+    read_parquet_or_csv,
+    read_cache_info,
+    save_cache_info,
     calc_country_total,
     calc_worldwide_total,
 )
 
+JHU_SUBSET_URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{subset}_global.csv"  # noqa: E501
+JHU_DATE_FORMAT = "%m/%d/%y"
+JHU_SUBSETS = ["confirmed", "deaths", "recovered"]
+
 
-def get_JHU_data_subset(subset: str) -> pd.DataFrame:
+def get_JHU_data_subset(
+    subset: str, csv_content: Optional[bytes] = None
+) -> pd.DataFrame:
     """
     Retrives covid19 data subset from JHU (Johns Hopkins University)
     https://github.com/CSSEGISandData/COVID-19
@@ -19,35 +36,92 @@ def get_JHU_data_subset(subset: str) -> pd.DataFrame:
     subset : str
         Name of the subset, currently 'confirmed' or 'deaths'
         see: https://github.com/CSSEGISandData/COVID-19/issues/1250
+    csv_content : Optional[bytes], optional
+        Already downloaded content of the subsets csv file,
+        by default None which downloads the file
 
     Returns
     -------
     pd.DataFrame
         Dataframe containing the covid19 data subset from JHU
     """
-    JHU_subset = pd.read_csv(
-        f"https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{subset}_global.csv"  # noqa: E501
-    ).drop(["Long", "Lat"], axis=1)
+    if csv_content is None:
+        csv_content, _ = download_if_modified(JHU_SUBSET_URL.format(subset=subset))
+    JHU_table = pyarrow.csv.read_csv(
+        io.BytesIO(csv_content),
+        convert_options=pyarrow.csv.ConvertOptions(strings_can_be_null=True),
+    )
+    JHU_subset = JHU_table.to_pandas().drop(["Long", "Lat"], axis=1)
     JHU_subset.rename(
         columns={"Country/Region": "parent_region", "Province/State": "region"},
         inplace=True,
     )
-    global_selector = JHU_subset["region"].isna()
-    JHU_subset.loc[global_selector, "region"] = JHU_subset[global_selector][
-        "parent_region"
-    ]
-    JHU_subset.loc[global_selector, "parent_region"] = "#Global"
-    date_columns = JHU_subset.columns.drop(["region", "parent_region"])
-    tranformed = JHU_subset.melt(
-        id_vars=["region", "parent_region"],
-        value_vars=date_columns,
-        var_name="date",
-        value_name=subset,
-    )
-    tranformed["date"] = pd.to_datetime(tranformed["date"])
+    regions = JHU_subset["region"].to_numpy(dtype=object, copy=True)
+    parent_regions = JHU_subset["parent_region"].to_numpy(dtype=object, copy=True)
+    global_selector = pd.isna(regions)
+    regions[global_selector] = parent_regions[global_selector]
+    parent_regions[global_selector] = "#Global"
+    JHU_subset["region"] = regions
+    JHU_subset["parent_region"] = parent_regions
+    JHU_subset.set_index(["region", "parent_region"], inplace=True)
+    # parsing the date columns before reshaping, only parses each date once
+    JHU_subset.columns = pd.to_datetime(
+        JHU_subset.columns, format=JHU_DATE_FORMAT
+    ).rename("date")
+    tranformed = JHU_subset.stack(dropna=False).rename(subset).reset_index()
     return tranformed
 
 
+def download_JHU_data_subsets(
+    cache_info: Dict[str, Dict[str, str]] = {},
+) -> Tuple[Optional[List[bytes]], Dict[str, Dict[str, str]]]:
+    """
+    Downloads the csv files of all JHU_SUBSETS concurrently,
+    unless none of them changed since the downloads described by cache_info.
+
+    Parameters
+    ----------
+    cache_info : Dict[str, Dict[str, str]], optional
+        Cache info of the last downloads, with the urls as keys, by default {}
+
+    Returns
+    -------
+    Tuple[Optional[List[bytes]], Dict[str, Dict[str, str]]]
+        Contents of the csv files in the order of JHU_SUBSETS,
+        which is None if none of the files was modified,
+        and the cache info of the downloads.
+
+    See Also
+    --------
+    covid19_data_analyzer.data_functions.data_utils.download_if_modified
+    """
+    subset_urls = [JHU_SUBSET_URL.format(subset=subset) for subset in JHU_SUBSETS]
+    # the subsets are independent downloads, so they are fetched concurrently
+    with ThreadPoolExecutor(max_workers=len(JHU_SUBSETS)) as executor:
+        downloads = dict(
+            zip(
+                subset_urls,
+                executor.map(
+                    lambda url: download_if_modified(url, cache_info.get(url)),
+                    subset_urls,
+                ),
+            )
+        )
+        not_modified_urls = [
+            url for url, (content, _) in downloads.items() if content is None
+        ]
+        if len(not_modified_urls) == len(subset_urls):
+            return None, cache_info
+        # the unchanged subsets are still needed to rebuild the data
+        downloads.update(
+            zip(
+                not_modified_urls, executor.map(download_if_modified, not_modified_urls)
+            )
+        )
+    subset_contents = [downloads[url][0] for url in subset_urls]
+    return subset_contents, {url: downloads[url][1] for url in subset_urls}
+
+
 def get_JHU_data(update_data: bool = False) -> pd.DataFrame:
     """
     Retrives covid19 data from JHU (Johns Hopkins University)
@@ -69,20 +143,49 @@ def get_JHU_data(update_data: bool = False) -> pd.DataFrame:
     --------
     get_JHU_data_subset
     """
-    local_save_path = get_data_path("JHU/covid19_infections.csv")
-    if local_save_path.exists():
-        JHU_data = pd.read_csv(local_save_path, parse_dates=["date"])
-    if not local_save_path.exists() or update_data:
+    local_save_path = get_data_path("JHU/covid19_infections.parquet")
+    cache_info_path = get_data_path("JHU/etag.json")
+    has_local_data = data_file_exists(local_save_path)
+    if has_local_data:
+        JHU_data = read_parquet_or_csv(local_save_path, parse_dates=["date"])
+    if not has_local_data or update_data:
         print("Fetching updated data: JHU")
-        confirmed = get_JHU_data_subset("confirmed")
-        deaths = get_JHU_data_subset("deaths")
-        recovered = get_JHU_data_subset("recovered")
-        JHU_data = pd.merge(confirmed, deaths, on=["date", "region", "parent_region"])
-        JHU_data = pd.merge(JHU_data, recovered, on=["date", "region", "parent_region"])
-        country_total = calc_country_total(JHU_data)
-        JHU_data = JHU_data.append(country_total, ignore_index=True)
-        JHU_data = JHU_data.append(calc_worldwide_total(JHU_data), ignore_index=True)
-        get_infectious(JHU_data)
-        JHU_data.sort_values(["date", "parent_region", "region"], inplace=True)
-        JHU_data.set_index("date").to_csv(local_save_path)
+        # the cache info is only used if there is local data to fall back to
+        cache_info = read_cache_info(cache_info_path) if has_local_data else {}
+        subset_contents, cache_info = download_JHU_data_subsets(cache_info)
+        if subset_contents is None:
+            print("The data of JHU is already up to date")
+        else:
+            with ThreadPoolExecutor(max_workers=len(JHU_SUBSETS)) as executor:
+                confirmed, deaths, recovered = executor.map(
+                    get_JHU_data_subset, JHU_SUBSETS, subset_contents
+                )
+            key_columns = ["region", "parent_region", "date"]
+            JHU_data = confirmed
+            for subset, subset_data in zip(JHU_SUBSETS[1:], (deaths, recovered)):
+                # subsets with the same rows as the data can be aligned without
+                # hashing the keys, which is the case for confirmed and deaths
+                if subset_data[key_columns].equals(JHU_data[key_columns]):
+                    JHU_data[subset] = subset_data[subset].to_numpy()
+                else:
+                    JHU_data = pd.merge(JHU_data, subset_data, on=key_columns)
+            country_total = calc_country_total(JHU_data)
+            # the worldwide total only needs the country level rows,
+            # so the full data only gets copied once by the final concat
+            worldwide_total = calc_worldwide_total(
+                pd.concat(
+                    [JHU_data[JHU_data["parent_region"] == "#Global"], country_total],
+                    ignore_index=True,
+                )
+            )
+            JHU_data = pd.concat(
+                [JHU_data, country_total, worldwide_total], ignore_index=True
+            )
+            get_infectious(JHU_data)
+            JHU_data.sort_values(["date", "parent_region", "region"], inplace=True)
+            JHU_data.to_parquet(
+                local_save_path, engine="pyarrow", compression="snappy", index=False
+            )
+            save_cache_info(cache_info_path, cache_info)
+    categorize_regions(JHU_data)
     return JHU_data
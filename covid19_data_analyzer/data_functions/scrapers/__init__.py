@@ -1,3 +1,6 @@
+from datetime import date
+from functools import lru_cache
+
 import pandas as pd
 
 from covid19_data_analyzer.data_functions.scrapers.funkeinteraktiv import (
@@ -8,11 +11,11 @@ from covid19_data_analyzer.data_functions.scrapers.JHU import get_JHU_data
 ALLOWED_SOURCES = ["funkeinteraktiv_de", "funkeinteraktiv_en", "JHU"]
 
 
-def get_data(
+def load_data(
     data_source: str = "funkeinteraktiv_de", update_data: bool = False
 ) -> pd.DataFrame:
     """
-    Convenience function to quickly get covid19 data from the supported sources.
+    Loads the covid19 data of a data_source, without any caching.
 
     Parameters
     ----------
@@ -32,6 +35,10 @@ def get_data(
     ------
     ValueError
         If data_source is not supported
+
+    See Also
+    --------
+    get_data
     """
     if data_source == "funkeinteraktiv_de":
         return get_funkeinteraktiv_data(update_data=update_data, language="de")
@@ -44,3 +51,71 @@ def get_data(
             f"The data_source '{data_source}', is not supported.\n"
             f"The supported values for 'data_source' are {ALLOWED_SOURCES}"
         )
+
+
+@lru_cache(maxsize=len(ALLOWED_SOURCES))
+def get_data_of_day(data_source: str, day: str) -> pd.DataFrame:
+    """
+    Cached version of load_data, which only reads the locally saved data
+    of a data_source once per day.
+    Since the day is part of the cache key, the data of the previous day
+    gets evicted from the cache once it is requested on the next day.
+
+    Parameters
+    ----------
+    data_source : "funkeinteraktiv_de"|"funkeinteraktiv_en"|"JHU"
+        source from which the data should be fetched
+    day : str
+        ISO formatted date of the day the data is requested on
+
+    Returns
+    -------
+    pd.DataFrame
+        covid19 DataFrame
+
+    See Also
+    --------
+    load_data
+    """
+    return load_data(data_source)
+
+
+def get_data(
+    data_source: str = "funkeinteraktiv_de", update_data: bool = False
+) -> pd.DataFrame:
+    """
+    Convenience function to quickly get covid19 data from the supported sources.
+    The locally saved data is only read once per day, on later calls
+    a shallow copy of the already read data is returned.
+    Adding or replacing columns of the returned DataFrame is safe,
+    but its values must not be changed inplace.
+
+    Parameters
+    ----------
+    data_source : "funkeinteraktiv_de"|"funkeinteraktiv_en"|"JHU", optional
+        source from which the data should be fetched, by default "funkeinteraktiv_de"
+
+    update_data : bool, optional
+        Whether to fetch updated data or not, if the locally saved data
+        doesn't include today.
+
+    Returns
+    -------
+    pd.DataFrame
+        covid19 DataFrame
+
+    Raises
+    ------
+    ValueError
+        If data_source is not supported
+
+    See Also
+    --------
+    get_data_of_day
+    """
+    if update_data:
+        covid19_data = load_data(data_source, update_data=True)
+        # the cached data might be outdated after an update
+        get_data_of_day.cache_clear()
+        return covid19_data
+    return get_data_of_day(data_source, date.today().isoformat()).copy(deep=False)
@@ -1,11 +1,21 @@
+import io
+
 import pandas as pd
 
 from covid19_data_analyzer.data_functions.data_utils import (
+    categorize_regions,
+    data_file_exists,
+    download_if_modified,
     get_data_path,
     get_infectious,
+    read_parquet_or_csv,
+    read_cache_info,
+    save_cache_info,
     calc_worldwide_total,
 )
 
+FUNKEINTERAKTIV_URL = "https://funkeinteraktiv.b-cdn.net/history.v4.csv"
+
 
 def get_funkeinteraktiv_language_data(
     covid19_data: pd.DataFrame, language: str
@@ -39,7 +49,8 @@ def get_funkeinteraktiv_language_data(
     else:
         rename_dict = dict(zip(language_labels_en, target_labels))
         drop_list = language_labels_de
-    return covid19_data.drop(drop_list, axis=1).rename(columns=rename_dict)
+    # drop already returns a new DataFrame, so rename doesn't need to copy it again
+    return covid19_data.drop(drop_list, axis=1).rename(columns=rename_dict, copy=False)
 
 
 def get_funkeinteraktiv_data(
@@ -64,56 +75,81 @@ def get_funkeinteraktiv_data(
         Dataframe containing the covid19 data from morgenpost.de
     """
     translation_table_path = get_data_path("funkeinteraktiv_de/translation_table.csv")
-    local_save_path_de = get_data_path("funkeinteraktiv_de/covid19_infections.csv")
-    local_save_path_en = get_data_path("funkeinteraktiv_en/covid19_infections.csv")
+    local_save_path_de = get_data_path("funkeinteraktiv_de/covid19_infections.parquet")
+    local_save_path_en = get_data_path("funkeinteraktiv_en/covid19_infections.parquet")
+    cache_info_path = get_data_path("funkeinteraktiv_de/etag.json")
     if language == "de":
         local_save_path = local_save_path_de
     else:
         local_save_path = local_save_path_en
-    if local_save_path.exists():
-        funkeinteraktiv_data = pd.read_csv(local_save_path, parse_dates=["date"])
-    if not local_save_path.exists() or update_data:
-        print("Fetching updated data: funkeinteraktiv")
-        columns_to_drop = [
-            "id",
-            "parent",
-            "lon",
-            "lat",
-            "levels",
-            "updated",
-            "retrieved",
-            "source",
-            "source_url",
-            "scraper",
-        ]
-        funkeinteraktiv_data = pd.read_csv(
-            "https://funkeinteraktiv.b-cdn.net/history.v4.csv", parse_dates=["date"],
-        ).drop(columns_to_drop, axis=1)
-        funkeinteraktiv_data.fillna(
-            {"label_parent": "#Global", "label_parent_en": "#Global"}, inplace=True
+    has_local_data = data_file_exists(local_save_path)
+    if has_local_data:
+        funkeinteraktiv_data = read_parquet_or_csv(
+            local_save_path, parse_dates=["date"]
         )
-        funkeinteraktiv_data = funkeinteraktiv_data.append(
-            calc_worldwide_total(funkeinteraktiv_data, "label_parent", "label"),
-            ignore_index=True,
-        )
-        get_infectious(funkeinteraktiv_data)
-        funkeinteraktiv_data.sort_values(
-            ["date", "label_parent", "label"], inplace=True
+    if not has_local_data or update_data:
+        print("Fetching updated data: funkeinteraktiv")
+        # the cache info is only used if there is local data to fall back to
+        cache_info = read_cache_info(cache_info_path) if has_local_data else {}
+        csv_content, url_cache_info = download_if_modified(
+            FUNKEINTERAKTIV_URL, cache_info.get(FUNKEINTERAKTIV_URL)
         )
+        cache_info[FUNKEINTERAKTIV_URL] = url_cache_info
+        if csv_content is None:
+            print("The data of funkeinteraktiv is already up to date")
+        else:
+            columns_to_drop = [
+                "id",
+                "parent",
+                "lon",
+                "lat",
+                "levels",
+                "updated",
+                "retrieved",
+                "source",
+                "source_url",
+                "scraper",
+            ]
+            funkeinteraktiv_data = pd.read_csv(
+                io.BytesIO(csv_content), parse_dates=["date"]
+            ).drop(columns_to_drop, axis=1)
+            funkeinteraktiv_data.fillna(
+                {"label_parent": "#Global", "label_parent_en": "#Global"}, inplace=True
+            )
+            funkeinteraktiv_data = pd.concat(
+                [
+                    funkeinteraktiv_data,
+                    calc_worldwide_total(funkeinteraktiv_data, "label_parent", "label"),
+                ],
+                ignore_index=True,
+            )
+            get_infectious(funkeinteraktiv_data)
+            funkeinteraktiv_data.sort_values(
+                ["date", "label_parent", "label"], inplace=True
+            )
+            funkeinteraktiv_data_de = get_funkeinteraktiv_language_data(
+                funkeinteraktiv_data, "de"
+            )
+            funkeinteraktiv_data_en = get_funkeinteraktiv_language_data(
+                funkeinteraktiv_data, "en"
+            )
 
-        get_funkeinteraktiv_language_data(funkeinteraktiv_data, "de").set_index(
-            "date"
-        ).to_csv(local_save_path_de)
+            funkeinteraktiv_data_de.to_parquet(
+                local_save_path_de, engine="pyarrow", compression="snappy", index=False
+            )
 
-        get_funkeinteraktiv_language_data(funkeinteraktiv_data, "en").set_index(
-            "date"
-        ).to_csv(local_save_path_en)
+            funkeinteraktiv_data_en.to_parquet(
+                local_save_path_en, engine="pyarrow", compression="snappy", index=False
+            )
 
-        funkeinteraktiv_data[
-            ["label_parent", "label", "label_parent_en", "label_en"]
-        ].drop_duplicates().to_csv(translation_table_path, index=False)
+            funkeinteraktiv_data[
+                ["label_parent", "label", "label_parent_en", "label_en"]
+            ].drop_duplicates().to_csv(translation_table_path, index=False)
 
-        funkeinteraktiv_data = get_funkeinteraktiv_language_data(
-            funkeinteraktiv_data, language=language
-        )
+            if language == "de":
+                funkeinteraktiv_data = funkeinteraktiv_data_de
+            else:
+                funkeinteraktiv_data = funkeinteraktiv_data_en
+            save_cache_info(cache_info_path, cache_info)
+    categorize_regions(funkeinteraktiv_data)
     return funkeinteraktiv_data
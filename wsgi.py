@@ -5,6 +5,9 @@ import os
 logging.basicConfig(stream=sys.stderr)
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+# importing the app loads the data of all sources, so preforking servers should
+# import this module before forking (e.g. 'gunicorn --preload wsgi'),
+# which lets all workers share the imported modules and data
 from covid19_data_analyzer.dashboard.index import app  # noqa: E402
 
 application = app.server